@@ -3,21 +3,71 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING
 
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import ConfigType
 
 from .api import GreenchoiceApi, ProfileId
-from .const import CONF_AGREEMENT_ID, CONF_CUSTOMER_NUMBER, LOGGER
-from .importer import GreenchoiceImporter
+from .const import (
+    CONF_AGREEMENT_ID,
+    CONF_CUSTOMER_NUMBER,
+    CONF_SHORT_TERM_STATISTICS,
+    DOMAIN,
+    LOGGER,
+)
+from .error import GreenchoiceError
+from .importer import IMPORT_WINDOW_DAYS, GreenchoiceImporter
+
+PLATFORMS = [Platform.SENSOR]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+SERVICE_REFRESH = "refresh"
+ATTR_DAYS = "days"
+REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DAYS, default=3): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=IMPORT_WINDOW_DAYS)
+        ),
+    }
+)
+
+GreenchoiceConfigEntry = ConfigEntry[GreenchoiceImporter]
 
-if TYPE_CHECKING:
-    from homeassistant.config_entries import ConfigEntry
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Greenchoice services."""
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    async def _refresh(call: ServiceCall) -> None:
+        """Refresh the last days of every loaded agreement."""
+        entries: list[GreenchoiceConfigEntry] = [
+            entry
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.state is ConfigEntryState.LOADED
+        ]
+        failed: list[str] = []
+        for entry in entries:
+            try:
+                await entry.runtime_data.async_refresh(call.data[ATTR_DAYS])
+            except GreenchoiceError as exception:
+                LOGGER.error("Refreshing %s failed: %s", entry.title, exception)
+                failed.append(entry.title)
+        if failed:
+            raise HomeAssistantError(f"Refreshing {', '.join(failed)} failed")
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_REFRESH, _refresh, schema=REFRESH_SCHEMA
+    )
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: GreenchoiceConfigEntry) -> bool:
     """Set up Greenchoice from a config entry."""
 
     api = GreenchoiceApi(entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD])
@@ -26,27 +76,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         agreement_id=entry.data[CONF_AGREEMENT_ID],
     )
     importer = GreenchoiceImporter(
-        hass=hass, api=api, name=entry.title, profile=profile
+        hass=hass,
+        api=api,
+        name=entry.title,
+        profile=profile,
+        short_term=entry.options.get(CONF_SHORT_TERM_STATISTICS, False),
     )
 
     async def _import_values(_: datetime | None = None) -> None:
         """Import values."""
         try:
             LOGGER.debug("Starting scheduled import of statistics...")
-            async with api:
-                await api.login()
-                await importer.import_data()
+            await importer.async_import()
         except Exception as exception:
             LOGGER.exception("Unknown error %s", exception)
 
     try:
-        async with api:
-            await api.login()
-            await importer.import_data()
+        await importer.async_load()
+        await importer.async_import()
     except Exception as exception:
         LOGGER.exception("Unknown error %s", exception)
         return False
 
+    entry.runtime_data = importer
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
     cancel_scheduled_import = async_track_time_interval(
         hass,
         _import_values,
@@ -55,9 +109,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     entry.async_on_unload(cancel_scheduled_import)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    return True
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options are picked up."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_unload_entry(
+    hass: HomeAssistant, entry: GreenchoiceConfigEntry
+) -> bool:
+    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
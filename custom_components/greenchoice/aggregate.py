@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from .model import ConsumptionCost
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def bucket_start(moment: datetime, minutes: int) -> datetime:
+    """Start of the `minutes` long bucket containing `moment`.
+
+    `minutes` must divide an hour.
+    """
+    return moment.replace(
+        minute=moment.minute - moment.minute % minutes, second=0, microsecond=0
+    )
+
+
+def _reduce(models: list[ModelT], factor: float = 1.0) -> ModelT:
+    """Sum the numeric fields of `models` times `factor`.
+
+    A flag is only true when it is true for every model, so a partly published
+    bucket does not count as published. Other fields are taken from the first model.
+    """
+    model_type = type(models[0])
+    fields: dict[str, Any] = {}
+    for name in model_type.model_fields:
+        values = [getattr(model, name) for model in models]
+        present = [value for value in values if value is not None]
+        if not present:
+            fields[name] = None
+        elif isinstance(present[0], bool):
+            fields[name] = all(present)
+        elif isinstance(present[0], BaseModel):
+            fields[name] = _reduce(present, factor)
+        elif isinstance(present[0], float | int):
+            fields[name] = sum(present) * factor
+        else:
+            fields[name] = present[0]
+    # The inputs were validated already, so skip validating the sum
+    return model_type.model_construct(**fields)
+
+
+def aggregate(
+    entries: list[ConsumptionCost], minutes: int, size: int = 1
+) -> list[ConsumptionCost]:
+    """Combine readings into buckets of `minutes`, ordered by time.
+
+    Buckets with fewer than `size` readings are left out, the rest of their
+    readings is not published yet.
+    """
+    buckets: dict[datetime, list[ConsumptionCost]] = {}
+    for entry in entries:
+        buckets.setdefault(bucket_start(entry.consumed_on, minutes), []).append(entry)
+
+    aggregated: list[ConsumptionCost] = []
+    for start in sorted(buckets):
+        bucket = buckets[start]
+        if len(bucket) < size:
+            continue
+        combined = bucket[0] if len(bucket) == 1 else _reduce(bucket)
+        aggregated.append(combined.model_copy(update={"consumed_on": start}))
+    return aggregated
+
+
+def spread(
+    entries: list[ConsumptionCost], length: int, minutes: int
+) -> list[ConsumptionCost]:
+    """Split readings that each cover `length` minutes evenly over buckets of `minutes`.
+
+    The meter does not report how usage is distributed within a reading, so each
+    bucket gets an equal share and the buckets add up to the reading.
+    """
+    if length <= minutes:
+        return aggregate(entries, minutes)
+    parts = length // minutes
+    spread_entries: list[ConsumptionCost] = []
+    for entry in entries:
+        share = _reduce([entry], 1 / parts)
+        spread_entries.extend(
+            share.model_copy(
+                update={
+                    "consumed_on": entry.consumed_on + timedelta(minutes=n * minutes)
+                }
+            )
+            for n in range(parts)
+        )
+    return spread_entries
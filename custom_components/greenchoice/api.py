@@ -1,14 +1,22 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor
 from dataclasses import dataclass
 from datetime import date, timedelta
+import logging
+import time
 from types import TracebackType
 
 import aiohttp
 from pydantic import ValidationError
 
-from .const import BASE_URL
-from .error import GreenchoiceError
+from .const import BASE_URL, INLINE_PARSE_MAX_CHARS, INTERVAL_HOUR
+from .error import GreenchoiceError, RequestRejectedError
 from .auth import setup_auth
 from .model import Consumption, Profile
+from .session import Session
+
+_logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -24,13 +32,21 @@ class ProfileId:
 
 
 class GreenchoiceApi:
-    def __init__(self, username: str, password: str) -> None:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        executor: Executor | None = None,
+        session_factory: Callable[[], Session] = aiohttp.ClientSession,
+    ) -> None:
         self._username = username
         self._password = password
-        self._session: aiohttp.ClientSession | None = None
+        self._executor = executor
+        self._session_factory = session_factory
+        self._session: Session | None = None
 
     async def __aenter__(self):
-        self._session = aiohttp.ClientSession()
+        self._session = self._session_factory()
         await self._session.__aenter__()
 
     async def __aexit__(
@@ -62,6 +78,11 @@ class GreenchoiceApi:
             raise GreenchoiceError from ex
 
     async def get_hourly_readings(self, profile: ProfileId, day: date) -> Consumption:
+        return await self.get_readings(profile, day, INTERVAL_HOUR)
+
+    async def get_readings(
+        self, profile: ProfileId, day: date, interval: str
+    ) -> Consumption:
         if self._session is None:
             raise RuntimeError("API must be used from `with` statement")
         try:
@@ -69,14 +90,46 @@ class GreenchoiceApi:
             end = day + timedelta(days=1)
             consumption_response = await self._session.get(
                 f"{BASE_URL}/api/v2/customers/{profile.customer_number}/agreements/{profile.agreement_id}/consumptions",
-                params={"interval": "hour", "start": str(start), "end": str(end)},
+                params={"interval": interval, "start": str(start), "end": str(end)},
             )
 
             consumption_response.raise_for_status()
 
             consumption_body = await consumption_response.text()
-            return Consumption.model_validate_json(consumption_body)
+            return await self._parse_consumption(consumption_body)
+        except aiohttp.ClientResponseError as ex:
+            if 400 <= ex.status < 500 and ex.status not in (401, 403, 429):
+                raise RequestRejectedError from ex
+            raise GreenchoiceError from ex
         except aiohttp.ClientError as ex:
             raise GreenchoiceError from ex
         except ValidationError as ex:
             raise GreenchoiceError from ex
+
+    async def _parse_consumption(self, body: str) -> Consumption:
+        """Parse a consumption body, off the event loop when it is large.
+
+        Small bodies are cheaper to parse inline than to hand off, so only
+        bodies above `INLINE_PARSE_MAX_CHARS` go to the executor (the loop's
+        default executor unless one was passed to the constructor). A single
+        day of hourly readings stays below it and is always parsed inline.
+        """
+        started = time.perf_counter()
+        if len(body) <= INLINE_PARSE_MAX_CHARS:
+            consumption = Consumption.model_validate_json(body)
+            _logger.debug(
+                "Parsed %d characters inline, blocked event loop for %.1f ms",
+                len(body),
+                (time.perf_counter() - started) * 1000,
+            )
+            return consumption
+
+        consumption = await asyncio.get_running_loop().run_in_executor(
+            self._executor, Consumption.model_validate_json, body
+        )
+        _logger.debug(
+            "Parsed %d characters in executor in %.1f ms",
+            len(body),
+            (time.perf_counter() - started) * 1000,
+        )
+        return consumption
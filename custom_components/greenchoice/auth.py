@@ -4,6 +4,7 @@ import aiohttp
 import bs4
 
 from .error import GreenchoiceError
+from .session import Session
 
 from .const import BASE_URL, SSO_URL
 
@@ -15,7 +16,7 @@ class LoginError(GreenchoiceError):
 _logger = logging.getLogger(__name__)
 
 
-async def _get_antiforgery_token(session: aiohttp.ClientSession) -> str | None:
+async def _get_antiforgery_token(session: Session) -> str | None:
     """Get the antiforgery token from the API."""
     response = await session.get(f"{SSO_URL}/api/antiforgery")
     response.raise_for_status()
@@ -42,7 +43,7 @@ def _get_oidc_params(html_txt: str) -> dict[str, str]:
     }
 
 
-async def _login(session: aiohttp.ClientSession, username: str, password: str):
+async def _login(session: Session, username: str, password: str):
     _logger.debug("Retrieving login cookies")
 
     # Get the antiforgery token
@@ -102,7 +103,7 @@ async def _login(session: aiohttp.ClientSession, username: str, password: str):
     _logger.debug("Login success")
 
 
-async def setup_auth(session: aiohttp.ClientSession, username: str, password: str):
+async def setup_auth(session: Session, username: str, password: str):
     try:
         await _login(session, username, password)
     except aiohttp.ClientError as ex:
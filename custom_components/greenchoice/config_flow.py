@@ -6,13 +6,19 @@ from typing import Any
 
 from .error import GreenchoiceError
 
-from .const import CONF_CUSTOMER_NUMBER, CONF_AGREEMENT_ID
+from .const import CONF_CUSTOMER_NUMBER, CONF_AGREEMENT_ID, CONF_SHORT_TERM_STATISTICS
 from .api import GreenchoiceApi
 from .model import Profile
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.core import callback
 from homeassistant.helpers.selector import selector
 
 from .const import DOMAIN, LOGGER
@@ -63,6 +69,11 @@ class GreenchoiceConfigFlow(ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        return GreenchoiceOptionsFlow()
+
     @staticmethod
     def _get_label_for_profile(profile: Profile) -> str:
         return f"{profile.street} {profile.house_number}"
@@ -133,3 +144,28 @@ class GreenchoiceConfigFlow(ConfigFlow, domain=DOMAIN):
                 CONF_AGREEMENT_ID: agreement_id,
             },
         )
+
+
+class GreenchoiceOptionsFlow(OptionsFlow):
+    """Handle options for Greenchoice."""
+
+    async def async_step_init(
+        self,
+        user_input: dict[str, Any] | None = None,
+    ) -> ConfigFlowResult:
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SHORT_TERM_STATISTICS,
+                        default=self.config_entry.options.get(
+                            CONF_SHORT_TERM_STATISTICS, False
+                        ),
+                    ): bool,
+                }
+            ),
+        )
@@ -2,10 +2,22 @@
 
 from logging import getLogger
 from typing import Final
+from zoneinfo import ZoneInfo
 
 DOMAIN = "greenchoice"
 LOGGER = getLogger(__package__)
 SSO_URL = "https://sso.greenchoice.nl"
 BASE_URL = "https://mijn.greenchoice.nl"
+# Greenchoice reports times in the timezone of the Netherlands
+TIMEZONE: Final = ZoneInfo("Europe/Amsterdam")
 CONF_CUSTOMER_NUMBER: Final = "customer_number"
 CONF_AGREEMENT_ID: Final = "agreement_id"
+# Response bodies longer than this are parsed in an executor, not on the event loop.
+# A day of hourly readings (~17k characters) parses inline in about 0.2 ms, a day of
+# quarter-hour readings (~67k characters) takes about 0.7 ms and is handed off.
+INLINE_PARSE_MAX_CHARS: Final = 32 * 1024
+INTERVAL_HOUR: Final = "hour"
+# Reading intervals to request, finest first, with their length in minutes.
+# Accounts without data at a finer interval fall back to the next one.
+READING_INTERVALS: Final = {"quarterHour": 15, INTERVAL_HOUR: 60}
+CONF_SHORT_TERM_STATISTICS: Final = "short_term_statistics"
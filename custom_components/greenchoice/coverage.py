@@ -0,0 +1,87 @@
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .api import ProfileId
+from .const import DOMAIN, TIMEZONE
+
+STORAGE_VERSION = 1
+
+
+def _hour_bit(moment: datetime) -> int:
+    return 1 << moment.astimezone(TIMEZONE).hour
+
+
+def _day_key(moment: datetime) -> str:
+    return moment.astimezone(TIMEZONE).date().isoformat()
+
+
+def expected_mask(day: date) -> int:
+    """Bitmap of the local hours that exist on `day`.
+
+    On DST changes one hour is skipped or repeated.
+    """
+    start = datetime(day.year, day.month, day.day, tzinfo=TIMEZONE).astimezone(UTC)
+    next_day = day + timedelta(days=1)
+    end = datetime(
+        next_day.year, next_day.month, next_day.day, tzinfo=TIMEZONE
+    ).astimezone(UTC)
+    mask = 0
+    moment = start
+    while moment < end:
+        mask |= _hour_bit(moment)
+        moment += timedelta(hours=1)
+    return mask
+
+
+class CoverageIndex:
+    """Per series bitmap of the hours that have been imported, one int per local day."""
+
+    def __init__(self, hass: HomeAssistant, profile: ProfileId):
+        self._store: Store[dict[str, dict[str, int]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.coverage_a{profile.agreement_id}"
+        )
+        self._series: dict[str, dict[str, int]] = {}
+
+    async def async_load(self) -> bool:
+        """Load the index from storage, returns False when nothing was stored yet."""
+        data = await self._store.async_load()
+        self._series = data or {}
+        return data is not None
+
+    async def async_save(self):
+        await self._store.async_save(self._series)
+
+    def mark(self, series: str, moment: datetime):
+        days = self._series.setdefault(series, {})
+        key = _day_key(moment)
+        days[key] = days.get(key, 0) | _hour_bit(moment)
+
+    def is_covered(self, series: str, moment: datetime) -> bool:
+        mask = self._series.get(series, {}).get(_day_key(moment), 0)
+        return bool(mask & _hour_bit(moment))
+
+    def missing_days(self, series: Iterable[str], days: Iterable[date]) -> list[date]:
+        series = list(series)
+        missing: list[date] = []
+        for day in days:
+            expected = expected_mask(day)
+            key = day.isoformat()
+            if any(
+                self._series.get(s, {}).get(key, 0) & expected != expected
+                for s in series
+            ):
+                missing.append(day)
+        return missing
+
+    def clear(self):
+        self._series = {}
+
+    def prune(self, oldest: date):
+        """Forget days before `oldest`, they are outside the import window."""
+        oldest_key = oldest.isoformat()
+        for days in self._series.values():
+            for key in [key for key in days if key < oldest_key]:
+                del days[key]
@@ -1,2 +1,6 @@
 class GreenchoiceError(Exception):
     pass
+
+
+class RequestRejectedError(GreenchoiceError):
+    """The API refused the request itself, so sending it again will not help."""
@@ -1,10 +1,14 @@
 import abc
-from datetime import UTC, date, datetime, timedelta
+import asyncio
+from collections.abc import Callable
+from datetime import UTC, date, datetime, time, timedelta
 from enum import Enum
 import logging
-from typing import Literal, cast
+import math
+from typing import Literal, NamedTuple, cast
 
 from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.db_schema import StatisticsShortTerm
 from homeassistant.components.recorder.models import (
     StatisticData,
     StatisticMeanType,
@@ -13,17 +17,27 @@ from homeassistant.components.recorder.models import (
 from homeassistant.components.recorder.statistics import (
     async_add_external_statistics,
     get_last_statistics,
+    statistics_during_period,
 )
 from homeassistant.const import CURRENCY_EURO, UnitOfEnergy, UnitOfVolume
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.util.unit_conversion import EnergyConverter, VolumeConverter
 
+from .aggregate import aggregate, spread
 from .api import GreenchoiceApi, ProfileId
+from .const import INTERVAL_HOUR, READING_INTERVALS, TIMEZONE
+from .coverage import CoverageIndex
+from .error import GreenchoiceError, RequestRejectedError
 from .model import ConsumptionCost
+from .recent import RecentReadings
 
 DOMAIN = "greenchoice"
 LOGGER = logging.getLogger(__name__)
 
+IMPORT_WINDOW_DAYS = 21  # keep the last 3 weeks complete
+SHORT_TERM_MINUTES = 5
+SHORT_TERM_DAYS = 10  # the recorder purges short-term statistics after this
+
 
 ConsumptionType = Literal["normal"] | Literal["low"] | Literal["total"]
 
@@ -55,6 +69,20 @@ class StatisticImport(abc.ABC):
     def statistic_id(self, profile: ProfileId):
         return f"{DOMAIN}:a{profile.agreement_id}_{self.unique_id}"
 
+    def is_imported(self, data: ConsumptionCost) -> bool:
+        """Whether the hour of `data` is done for this statistic.
+
+        That is when the agreement lacks the product, or the product reports its
+        consumption. Hours where it is not published yet must be fetched again.
+        """
+        product = getattr(data, self.product_type)
+        return product is None or product.has_consumption
+
+    def is_published(self, data: ConsumptionCost) -> bool:
+        """Whether `data` holds the product and reports its consumption."""
+        product = getattr(data, self.product_type)
+        return product is not None and product.has_consumption
+
 
 class ConsumptionImport(StatisticImport):
     def __init__(
@@ -181,21 +209,106 @@ class LastStat:
         self.sum = _sum
 
 
+class StoredStat(NamedTuple):
+    start: datetime
+    state: float
+    sum: float
+
+
+def plan_statistics(
+    values: dict[datetime, float], stored: list[StoredStat], last_sum: float
+) -> tuple[list[StatisticData], list[tuple[datetime, float]]]:
+    """Merge hourly values into a stored series.
+
+    Only hours that are new or have a different value are returned for writing,
+    with sums that include every earlier change. Each run of written hours that
+    is followed by stored hours yields one sum adjustment for those stored hours.
+    """
+    rows = {row.start: row for row in stored}
+    running = stored[0].sum - stored[0].state if stored else last_sum
+    offset = 0.0
+    run_delta = 0.0
+    statistics: list[StatisticData] = []
+    adjustments: list[tuple[datetime, float]] = []
+    for start in sorted(values.keys() | rows.keys()):
+        row = rows.get(start)
+        old = row.state if row else 0.0
+        if start not in values or math.isclose(values[start], old, abs_tol=1e-9):
+            if row is None:
+                continue
+            if run_delta:
+                adjustments.append((start, run_delta))
+                run_delta = 0.0
+            running = row.sum + offset
+            continue
+        value = values[start]
+        running += value
+        offset += value - old
+        run_delta += value - old
+        statistics.append(StatisticData(start=start, state=value, sum=running))
+    return statistics, adjustments
+
+
 class GreenchoiceImporter:
     def __init__(
-        self, hass: HomeAssistant, api: GreenchoiceApi, name: str, profile: ProfileId
+        self,
+        hass: HomeAssistant,
+        api: GreenchoiceApi,
+        name: str,
+        profile: ProfileId,
+        short_term: bool = False,
     ):
         self._api = api
         self._hass = hass
         self._name = name
         self._profile = profile
+        self._short_term = short_term
+        self._coverage = CoverageIndex(hass, profile)
+        self._recent = RecentReadings(hass, profile, STATS)
+        self._listeners: list[Callable[[], None]] = []
+        # Keeps imports and refreshes from fetching and planning at the same time.
+        # Their writes are only queued on the recorder, see `_import_days`.
+        self._lock = asyncio.Lock()
+        # Finest interval the account returned data for, detected on first fetch
+        self._interval: str | None = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def profile(self) -> ProfileId:
+        return self._profile
+
+    @property
+    def recent(self) -> RecentReadings:
+        return self._recent
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call `listener` whenever the recent readings change."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def async_load(self):
+        await self._recent.async_load()
+        if not await self._coverage.async_load():
+            await self._bootstrap_coverage()
 
     def import_stat_values(
         self,
         stat: StatisticImport,
         data: list[ConsumptionCost],
         last_stat: LastStat,
+        stored: list[StoredStat],
+        short_term: dict[datetime, list[ConsumptionCost]],
+        refresh: bool = False,
     ):
+        """Write the hours of `data` that are missing from the stored series.
+
+        With `refresh`, every hour of `data` is compared with the stored series
+        instead, and only hours with a different value are written.
+        """
         metadata = StatisticMetaData(
             mean_type=StatisticMeanType.NONE,
             has_sum=True,
@@ -205,21 +318,31 @@ class GreenchoiceImporter:
             unit_class=stat.unit_class,
             unit_of_measurement=stat.unit,
         )
-        statistics: list[StatisticData] = []
 
-        sum = last_stat.sum
+        values: dict[datetime, float] = {}
         for current_data in data:
-            if (
-                last_stat.last_stat is not None
-                and current_data.consumed_on <= last_stat.last_stat
-            ):
-                continue
             value = stat.get_value(current_data)
-            if value:
-                sum += value
-                statistics.append(
-                    StatisticData(start=current_data.consumed_on, state=value, sum=sum)
-                )
+            # A missing value is left as stored, only a reported zero is written
+            if value is None or not stat.is_published(current_data):
+                continue
+            if refresh:
+                values[current_data.consumed_on] = value
+            elif value and not self._coverage.is_covered(
+                stat.unique_id, current_data.consumed_on
+            ):
+                values[current_data.consumed_on] = value
+
+        statistics, adjustments = plan_statistics(values, stored, last_stat.sum)
+
+        # Adjustments are queued before the write, so they only shift stored hours
+        # and not the hours written below, whose sums already account for them.
+        for start, adjustment in adjustments:
+            LOGGER.debug(
+                "Adjusting %s sums from %s by %s", stat.name, start, adjustment
+            )
+            get_instance(self._hass).async_adjust_statistics(
+                metadata["statistic_id"], start, adjustment, stat.unit
+            )
 
         if any(statistics):
             LOGGER.debug("Adding %d statistics for %s", len(statistics), stat.name)
@@ -227,9 +350,45 @@ class GreenchoiceImporter:
         else:
             LOGGER.debug("No new statistics for %s", stat.name)
 
+        short_term_statistics = self._short_term_statistics(
+            stat, statistics, short_term
+        )
+        if short_term_statistics:
+            LOGGER.debug(
+                "Adding %d short-term statistics for %s",
+                len(short_term_statistics),
+                stat.name,
+            )
+            get_instance(self._hass).async_import_statistics(
+                metadata, short_term_statistics, StatisticsShortTerm
+            )
+
+    def _short_term_statistics(
+        self,
+        stat: StatisticImport,
+        statistics: list[StatisticData],
+        short_term: dict[datetime, list[ConsumptionCost]],
+    ) -> list[StatisticData]:
+        """Split each written hour into its short-term buckets, continuing its sums."""
+        short_term_statistics: list[StatisticData] = []
+        for hourly in statistics:
+            buckets = short_term.get(hourly["start"])
+            if not buckets:
+                continue
+            running = hourly["sum"] - hourly["state"]
+            for bucket in buckets:
+                value = stat.get_value(bucket)
+                if value:
+                    running += value
+                    short_term_statistics.append(
+                        StatisticData(
+                            start=bucket.consumed_on, state=value, sum=running
+                        )
+                    )
+        return short_term_statistics
+
     async def get_last_stats(self):
         statistics: dict[StatisticImport, LastStat] = {}
-        oldest_stat: datetime | None = None
         for stat in STATS:
             stat_id = stat.statistic_id(self._profile)
             last_stats = (
@@ -250,40 +409,174 @@ class GreenchoiceImporter:
             else:
                 last_stats_time = datetime.fromtimestamp(last_stat["start"], UTC)
                 _sum = cast(float, last_stat["sum"])
-                if oldest_stat is None or last_stats_time < oldest_stat:
-                    oldest_stat = last_stats_time
             statistics[stat] = LastStat(last_stats_time, _sum)
-        LOGGER.debug("Oldest statistic is: %s", oldest_stat)
-
-        return statistics, oldest_stat
 
-    async def import_data(self):
-        last_stats, first_stat = await self.get_last_stats()
+        return statistics
+
+    async def get_stored_stats(self, start: datetime):
+        """Get the stored hourly statistics from `start` onwards, for every stat."""
+        stat_ids = {stat.statistic_id(self._profile) for stat in STATS}
+        stored = await get_instance(self._hass).async_add_executor_job(
+            statistics_during_period,
+            self._hass,
+            start,
+            None,
+            stat_ids,
+            "hour",
+            None,
+            {"state", "sum"},
+        )
+        statistics: dict[StatisticImport, list[StoredStat]] = {}
+        for stat in STATS:
+            statistics[stat] = [
+                StoredStat(
+                    datetime.fromtimestamp(row["start"], UTC),
+                    row.get("state") or 0.0,
+                    row.get("sum") or 0.0,
+                )
+                for row in stored.get(stat.statistic_id(self._profile), [])
+            ]
+        return statistics
 
+    def _import_window(self) -> list[date]:
         today = date.today()
-        max_days = 21  # start with last 3 weeks
-        if first_stat is not None:
-            days_since = (today - first_stat.date()).days
-            max_days = min(max_days, days_since)
-        days = [today - timedelta(days=n) for n in range(max_days, 0, -1)]
+        return [today - timedelta(days=n) for n in range(IMPORT_WINDOW_DAYS, 0, -1)]
+
+    async def _bootstrap_coverage(self):
+        """Seed the coverage index from the statistics already in the recorder."""
+        start = datetime.combine(self._import_window()[0], time(), TIMEZONE)
+        stored = await self.get_stored_stats(start)
+        for stat, rows in stored.items():
+            for row in rows:
+                self._coverage.mark(stat.unique_id, row.start)
+        LOGGER.debug(
+            "Seeded coverage index from %d stored hours",
+            sum(len(rows) for rows in stored.values()),
+        )
+        await self._coverage.async_save()
+
+    async def get_readings(self, day: date):
+        """Get the readings for `day` at the finest interval the account provides.
+
+        Only a rejected request or a response at another interval moves on to the
+        next interval, other errors are raised so the day is retried next run.
+        """
+        intervals = [self._interval] if self._interval else list(READING_INTERVALS)
+        for interval in intervals:
+            last = interval == intervals[-1]
+            try:
+                consumption = await self._api.get_readings(self._profile, day, interval)
+            except RequestRejectedError:
+                if last:
+                    raise
+                LOGGER.debug("Interval %s rejected, trying next", interval)
+                continue
+            if interval != INTERVAL_HOUR and consumption.interval != interval:
+                if last:
+                    raise GreenchoiceError(
+                        f"Requested {interval} readings, got {consumption.interval}"
+                    )
+                LOGGER.debug(
+                    "Requested %s readings, got %s, trying next",
+                    interval,
+                    consumption.interval,
+                )
+                continue
+            if consumption.has_consumption or last:
+                if consumption.has_consumption and self._interval is None:
+                    LOGGER.debug("Using %s readings", interval)
+                    self._interval = interval
+                return consumption
+        raise GreenchoiceError("No readings interval available")
+
+    async def async_import(self):
+        """Log in and import the missing days."""
+        async with self._lock, self._api:
+            await self._api.login()
+            await self.import_data()
+
+    async def async_refresh(self, days: int):
+        """Log in and refresh the last `days` days."""
+        async with self._lock, self._api:
+            await self._api.login()
+            await self.refresh_data(days)
+
+    async def import_data(self):
+        window = self._import_window()
+        days = self._coverage.missing_days((stat.unique_id for stat in STATS), window)
+        if not days:
+            LOGGER.debug("No missing days to import")
+            return
 
         LOGGER.debug("Importing data for days: %s", days)
+        await self._import_days(days, refresh=False)
+        self._coverage.prune(window[0])
+        await self._coverage.async_save()
+
+    async def refresh_data(self, days: int):
+        """Fetch the last `days` days again and write only the hours that changed."""
+        today = date.today()
+        refresh_days = [today - timedelta(days=n) for n in range(days, 0, -1)]
+        LOGGER.debug("Refreshing data for days: %s", refresh_days)
+        await self._import_days(refresh_days, refresh=True)
+        await self._coverage.async_save()
 
-        all_consumption: list[ConsumptionCost] = []
+    async def _import_days(self, days: list[date], refresh: bool):
+        readings: list[ConsumptionCost] = []
         for day in days:
-            consumption = await self._api.get_hourly_readings(self._profile, day)
+            consumption = await self.get_readings(day)
             if consumption.has_consumption:
                 for entry in consumption.consumption_costs:
                     if entry.has_consumption:
-                        all_consumption.append(entry)
-
+                        readings.append(entry)
+
+        interval = self._interval or INTERVAL_HOUR
+        # Hours that are only partly published are left for a later import
+        all_consumption = (
+            aggregate(readings, 60, 60 // READING_INTERVALS[interval])
+            if interval != INTERVAL_HOUR
+            else readings
+        )
+        short_term: dict[datetime, list[ConsumptionCost]] = {}
+        if self._short_term and interval != INTERVAL_HOUR:
+            oldest = datetime.now(TIMEZONE) - timedelta(days=SHORT_TERM_DAYS)
+            length = READING_INTERVALS[interval]
+            for bucket in spread(readings, length, SHORT_TERM_MINUTES):
+                if bucket.consumed_on >= oldest:
+                    hour = bucket.consumed_on.replace(minute=0)
+                    short_term.setdefault(hour, []).append(bucket)
+
+        # Writes and adjustments of an earlier run may still be queued, planning
+        # against rows without them would apply the same adjustments twice
+        await get_instance(self._hass).async_block_till_done()
+        last_stats = await self.get_last_stats()
+        stored_stats = await self.get_stored_stats(
+            datetime.combine(days[0], time(), TIMEZONE)
+        )
         for stat in STATS:
             self.import_stat_values(
                 stat,
                 all_consumption,
                 last_stats[stat],
+                stored_stats[stat],
+                short_term,
+                refresh,
             )
+            for entry in all_consumption:
+                if stat.is_imported(entry):
+                    self._coverage.mark(stat.unique_id, entry.consumed_on)
+
+        if self._recent.update(all_consumption):
+            self._notify_listeners()
+
+    def _notify_listeners(self):
+        for listener in list(self._listeners):
+            listener()
 
     async def clear_data(self):
         ids = [stat.statistic_id(self._profile) for stat in STATS]
         get_instance(self._hass).async_clear_statistics(list(ids))
+        self._coverage.clear()
+        await self._coverage.async_save()
+        await self._recent.async_clear()
+        self._notify_listeners()
@@ -1,13 +1,14 @@
 from datetime import datetime
 from typing import Annotated
-from zoneinfo import ZoneInfo
 
 from pydantic import AfterValidator, BaseModel, ConfigDict
 from pydantic.alias_generators import to_camel
 
+from .const import TIMEZONE
+
 # Greenchoice datetimes have no timezone, so we assume the times are in timezone of the Netherlands
 AwareDateTime = Annotated[
-    datetime, AfterValidator(lambda dt: dt.replace(tzinfo=ZoneInfo("Europe/Amsterdam")))
+    datetime, AfterValidator(lambda dt: dt.replace(tzinfo=TIMEZONE))
 ]
 
 
@@ -0,0 +1,112 @@
+from collections import deque
+from datetime import date
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .api import ProfileId
+from .const import DOMAIN, TIMEZONE
+from .model import ConsumptionCost
+
+if TYPE_CHECKING:
+    from .importer import StatisticImport
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+RECENT_HOURS = 24 * 62  # enough to rebuild the month totals after a restart
+
+
+class RecentReadings:
+    """Ring buffer of the most recent hourly readings of an agreement.
+
+    Totals for the day and month of the latest reading are kept up to date as
+    readings are added, so sensors can read them without querying the recorder.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        profile: ProfileId,
+        stats: "list[StatisticImport]",
+        size: int = RECENT_HOURS,
+    ):
+        self._store: Store[list[dict]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.recent_a{profile.agreement_id}"
+        )
+        self._stats = stats
+        self._readings: deque[ConsumptionCost] = deque(maxlen=size)
+        self.day: date | None = None
+        self.month: date | None = None
+        self.day_totals: dict[str, float] = {}
+        self.month_totals: dict[str, float] = {}
+
+    @property
+    def latest(self) -> ConsumptionCost | None:
+        return self._readings[-1] if self._readings else None
+
+    async def async_load(self):
+        data = await self._store.async_load()
+        self._readings.clear()
+        self._readings.extend(
+            ConsumptionCost.model_validate(entry) for entry in data or []
+        )
+        self._rebuild_totals()
+
+    async def async_clear(self):
+        """Forget all readings, also the stored copy."""
+        self._readings.clear()
+        self._rebuild_totals()
+        # Replaces a pending delayed save of the old readings
+        await self._store.async_save([])
+
+    def _save_data(self) -> list[dict]:
+        return [
+            entry.model_dump(mode="json", by_alias=True) for entry in self._readings
+        ]
+
+    def update(self, entries: list[ConsumptionCost]) -> bool:
+        """Add hourly readings, returns whether anything changed."""
+        if not entries:
+            return False
+        entries = sorted(entries, key=lambda entry: entry.consumed_on)
+        latest = self.latest.consumed_on if self.latest else None
+        if latest is not None and entries[0].consumed_on <= latest:
+            # Refilled or corrected hours, merge them in and start the totals over
+            merged = {entry.consumed_on: entry for entry in self._readings}
+            merged.update((entry.consumed_on, entry) for entry in entries)
+            self._readings.clear()
+            self._readings.extend(merged[start] for start in sorted(merged))
+            self._rebuild_totals()
+        else:
+            for entry in entries:
+                self._readings.append(entry)
+                self._add_to_totals(entry)
+        self._store.async_delay_save(self._save_data, SAVE_DELAY)
+        return True
+
+    def _rebuild_totals(self):
+        self.day = self.month = None
+        self.day_totals = {}
+        self.month_totals = {}
+        for entry in self._readings:
+            self._add_to_totals(entry)
+
+    def _add_to_totals(self, entry: ConsumptionCost):
+        day = entry.consumed_on.astimezone(TIMEZONE).date()
+        month = day.replace(day=1)
+        if day != self.day:
+            self.day = day
+            self.day_totals = {}
+        if month != self.month:
+            self.month = month
+            self.month_totals = {}
+        for stat in self._stats:
+            value = stat.get_value(entry)
+            if value:
+                self.day_totals[stat.unique_id] = (
+                    self.day_totals.get(stat.unique_id, 0.0) + value
+                )
+                self.month_totals[stat.unique_id] = (
+                    self.month_totals.get(stat.unique_id, 0.0) + value
+                )
@@ -0,0 +1,96 @@
+"""Sensors for the Greenchoice integration, backed by the importer's recent readings."""
+
+from __future__ import annotations
+
+from datetime import datetime, time
+from typing import TYPE_CHECKING, Any, Literal
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.const import CURRENCY_EURO, UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, TIMEZONE
+from .importer import STATS, GreenchoiceImporter, StatisticImport
+
+if TYPE_CHECKING:
+    from . import GreenchoiceConfigEntry
+
+Period = Literal["hour", "day", "month"]
+
+PERIOD_NAMES: dict[Period, str] = {
+    "hour": "Last Hour",
+    "day": "Day",
+    "month": "Month",
+}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: GreenchoiceConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    importer = entry.runtime_data
+    async_add_entities(
+        GreenchoiceSensor(importer, stat, period)
+        for stat in STATS
+        for period in PERIOD_NAMES
+    )
+
+
+class GreenchoiceSensor(SensorEntity):
+    """Value of a statistic for the latest hour, or its total for that day or month."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(
+        self, importer: GreenchoiceImporter, stat: StatisticImport, period: Period
+    ):
+        self._importer = importer
+        self._stat = stat
+        self._period = period
+        agreement_id = importer.profile.agreement_id
+        self._attr_name = f"{stat.name} {PERIOD_NAMES[period]}"
+        self._attr_unique_id = f"a{agreement_id}_{stat.unique_id}_{period}"
+        self._attr_native_unit_of_measurement = stat.unit
+        if stat.unit == CURRENCY_EURO:
+            self._attr_device_class = SensorDeviceClass.MONETARY
+        elif stat.unit == UnitOfVolume.CUBIC_METERS:
+            self._attr_device_class = SensorDeviceClass.GAS
+        else:
+            self._attr_device_class = SensorDeviceClass.ENERGY
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, str(agreement_id))},
+            name=importer.name,
+            manufacturer="Greenchoice",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            self._importer.async_add_listener(self.async_write_ha_state)
+        )
+
+    def _period_start(self) -> datetime | None:
+        recent = self._importer.recent
+        if self._period == "hour":
+            return recent.latest.consumed_on if recent.latest else None
+        start = recent.day if self._period == "day" else recent.month
+        return datetime.combine(start, time(), TIMEZONE) if start else None
+
+    @property
+    def native_value(self) -> float | None:
+        recent = self._importer.recent
+        if recent.latest is None:
+            return None
+        if self._period == "hour":
+            return self._stat.get_value(recent.latest)
+        totals = recent.day_totals if self._period == "day" else recent.month_totals
+        return totals.get(self._stat.unique_id, 0.0)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        start = self._period_start()
+        return {"start": start.isoformat() if start else None}
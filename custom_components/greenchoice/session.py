@@ -0,0 +1,38 @@
+from collections.abc import Awaitable, Mapping
+from typing import Any, Protocol, Self
+
+from yarl import URL
+
+
+class Response(Protocol):
+    """The parts of `aiohttp.ClientResponse` the API and login use."""
+
+    @property
+    def url(self) -> URL: ...
+
+    def raise_for_status(self) -> None: ...
+
+    async def json(self) -> Any: ...
+
+    async def text(self) -> str: ...
+
+
+class Session(Protocol):
+    """The parts of `aiohttp.ClientSession` the API and login use."""
+
+    async def __aenter__(self) -> Self: ...
+
+    async def __aexit__(self, *exc_info: Any) -> None: ...
+
+    def get(
+        self, url: str, *, params: Mapping[str, str] | None = None
+    ) -> Awaitable[Response]: ...
+
+    def post(
+        self,
+        url: str,
+        *,
+        json: Any = None,
+        data: Any = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> Awaitable[Response]: ...
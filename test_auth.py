@@ -1,18 +1,44 @@
 import asyncio
 from custom_components.greenchoice.api import GreenchoiceApi, ProfileId
+from tests.recording import (
+    recording_session_factory,
+    replay_session_factory,
+)
 import os
 import logging
+import time
 from datetime import date, timedelta
 
 logging.basicConfig(level=logging.DEBUG)
 
+# Set GREENCHOICE_RECORD to a path (e.g. fixtures.json.gz) to save the sanitized
+# traffic, or GREENCHOICE_REPLAY to run against a saved archive without network access.
+record_path = os.environ.get("GREENCHOICE_RECORD")
+replay_path = os.environ.get("GREENCHOICE_REPLAY")
+replay_speed = float(os.environ.get("GREENCHOICE_REPLAY_SPEED", "1.0"))
 
-username = os.environ.get("GREENCHOICE_USERNAME") or input("Email: ")
-password = os.environ.get("GREENCHOICE_PASSWORD") or input("Password: ")
+if replay_path:
+    username = password = "replay"
+else:
+    username = os.environ.get("GREENCHOICE_USERNAME") or input("Email: ")
+    password = os.environ.get("GREENCHOICE_PASSWORD") or input("Password: ")
 
 
 async def main():
-    api = GreenchoiceApi(username, password)
+    if replay_path:
+        api = GreenchoiceApi(
+            username,
+            password,
+            session_factory=replay_session_factory(replay_path, replay_speed),
+        )
+    elif record_path:
+        api = GreenchoiceApi(
+            username, password, session_factory=recording_session_factory(record_path)
+        )
+    else:
+        api = GreenchoiceApi(username, password)
+
+    started = time.perf_counter()
     async with api:
         await api.login()
         profiles = await api.get_profiles()
@@ -20,13 +46,14 @@ async def main():
             print(
                 f"[{i}] Profile: {p.agreement_id} - {p.street} {p.house_number} ({p.energy_supply_status})"
             )
-        selected_profile_id = input("Select profile number: ")
+        selected_profile_id = "1" if replay_path else input("Select profile number: ")
         selected_profile = profiles[int(selected_profile_id) - 1]
 
         consumption = await api.get_hourly_readings(
             ProfileId.from_profile(selected_profile), date.today() - timedelta(days=3)
         )
         print(selected_profile.street, consumption)
+    print(f"Finished in {time.perf_counter() - started:.2f}s")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from custom_components.greenchoice.model import ConsumptionCost
+
+ELECTRICITY_PRICE = 0.25
+
+
+def reading(
+    consumed_on: datetime,
+    electricity: float | None = 1.0,
+    gas: float | None = 0.5,
+    has_electricity: bool = True,
+    has_gas: bool = True,
+) -> ConsumptionCost:
+    """Build a reading, a `None` value marks that product as not published yet."""
+    electricity_data = {
+        "deliveryLowConsumption": None,
+        "deliveryLowCosts": None,
+        "deliveryNormalConsumption": electricity,
+        "deliveryNormalCosts": None
+        if electricity is None
+        else electricity * ELECTRICITY_PRICE,
+        "fixedDeliveryCosts": None,
+        "gridOperatorCosts": None,
+        "totalFixedCosts": None,
+        "totalDeliveryCosts": None
+        if electricity is None
+        else electricity * ELECTRICITY_PRICE,
+        "totalDeliveryConsumption": electricity,
+        "hasConsumption": electricity is not None,
+    }
+    gas_data = {
+        "deliveryConsumption": gas,
+        "deliveryCosts": None,
+        "fixedDeliveryCosts": None,
+        "gridOperatorCosts": None,
+        "hasConsumption": gas is not None,
+    }
+    return ConsumptionCost.model_validate(
+        {
+            "consumedOn": consumed_on.replace(tzinfo=None).isoformat(),
+            "electricity": electricity_data if has_electricity else None,
+            "gas": gas_data if has_gas else None,
+            "hasConsumption": True,
+        }
+    )
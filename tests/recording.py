@@ -0,0 +1,303 @@
+"""Record and replay Greenchoice HTTP traffic, so the API can be exercised offline.
+
+Fixtures are meant to be committed, so only what `model.py` and `auth.py` read
+is kept, and of that everything that identifies the account is redacted.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable, Mapping
+import gzip
+import json
+import logging
+import re
+import time
+from typing import Any
+
+import aiohttp
+import bs4
+from multidict import CIMultiDict, CIMultiDictProxy
+from pydantic import BaseModel
+from pydantic.alias_generators import to_camel
+from yarl import URL
+
+from custom_components.greenchoice.model import (
+    Consumption,
+    ConsumptionCost,
+    ElectricityConsumptionData,
+    GasConsumptionData,
+    Profile,
+)
+from custom_components.greenchoice.session import Session
+
+ARCHIVE_VERSION = 1
+REDACTED = "REDACTED"
+
+
+def _model_keys(*models: type[BaseModel]) -> set[str]:
+    return {to_camel(name) for model in models for name in model.model_fields}
+
+
+# JSON keys read by the models and the login, any other key is dropped
+_KEPT_KEYS = _model_keys(
+    Profile,
+    Consumption,
+    ConsumptionCost,
+    ElectricityConsumptionData,
+    GasConsumptionData,
+) | {"requestToken", "redirectUri", "validationProblemDetails"}
+# Kept keys whose values identify the account holder
+_REDACTED_KEYS = {"street", "requestToken", "validationProblemDetails"}
+_ZEROED_KEYS = {"customerNumber", "agreementId", "houseNumber"}
+_KEPT_QUERY_KEYS = {"interval", "start", "end"}
+_OIDC_INPUTS = ("code", "scope", "state", "session_state")
+_ACCOUNT_PATH = re.compile(r"/(customers|agreements)/\d+")
+
+_logger = logging.getLogger(__name__)
+
+Exchange = dict[str, Any]
+
+
+def _sanitize_url(url: str | URL) -> str:
+    url = URL(url)
+    path = _ACCOUNT_PATH.sub(r"/\1/0", url.path)
+    query = {
+        key: value if key in _KEPT_QUERY_KEYS else REDACTED
+        for key, value in url.query.items()
+    }
+    return str(url.with_path(path).with_query(query))
+
+
+def _sanitize_item(key: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if key in _REDACTED_KEYS:
+        return REDACTED
+    if key in _ZEROED_KEYS:
+        return 0
+    if key == "redirectUri":
+        return _sanitize_url(value)
+    return _sanitize_json(value)
+
+
+def _sanitize_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _sanitize_item(key, item)
+            for key, item in value.items()
+            if key in _KEPT_KEYS
+        }
+    if isinstance(value, list):
+        return [_sanitize_json(item) for item in value]
+    return value
+
+
+def _sanitize_html(body: str) -> str:
+    """Replace a page by a form holding only the (redacted) OIDC inputs it had."""
+    soup = bs4.BeautifulSoup(body, "html.parser")
+    inputs = "".join(
+        f'<input name="{name}" value="{REDACTED}">'
+        for name in _OIDC_INPUTS
+        if soup.find("input", {"name": name})
+    )
+    return f"<form>{inputs}</form>" if inputs else ""
+
+
+def _sanitize_body(content_type: str, body: str) -> str:
+    if "json" in content_type and body:
+        return json.dumps(_sanitize_json(json.loads(body)))
+    if "html" in content_type:
+        return _sanitize_html(body)
+    return ""
+
+
+def _request_key(url: str, params: Mapping[str, str] | None) -> str:
+    return _sanitize_url(URL(url).update_query(params or {}))
+
+
+def _path_key(key: str) -> str:
+    return str(URL(key).with_query(None))
+
+
+def record_exchange(
+    method: str,
+    url: str,
+    params: Mapping[str, str] | None,
+    status: int,
+    response_url: str | URL,
+    content_type: str,
+    body: str,
+    elapsed: float,
+) -> Exchange:
+    """Sanitized record of one request and its response."""
+    return {
+        "method": method,
+        "key": _request_key(url, params),
+        "status": status,
+        "url": _sanitize_url(response_url),
+        "content_type": content_type,
+        "body": _sanitize_body(content_type, body),
+        "elapsed": elapsed,
+    }
+
+
+def load_fixtures(path: str) -> list[Exchange]:
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        data = json.load(archive)
+    if data.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported fixture archive version {data.get('version')}")
+    return data["exchanges"]
+
+
+def save_fixtures(path: str, exchanges: list[Exchange]):
+    with gzip.open(path, "wt", encoding="utf-8") as archive:
+        json.dump({"version": ARCHIVE_VERSION, "exchanges": exchanges}, archive)
+
+
+class RecordingSession:
+    """Wraps an `aiohttp.ClientSession`, keeping a sanitized copy of each exchange."""
+
+    def __init__(self, path: str, exchanges: list[Exchange]):
+        self._path = path
+        self._exchanges = exchanges
+        self._session = aiohttp.ClientSession()
+
+    async def __aenter__(self):
+        await self._session.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.__aexit__(*exc_info)
+        await asyncio.to_thread(save_fixtures, self._path, list(self._exchanges))
+        _logger.debug("Wrote %d exchanges to %s", len(self._exchanges), self._path)
+
+    async def get(
+        self, url: str, *, params: Mapping[str, str] | None = None
+    ) -> aiohttp.ClientResponse:
+        return await self._request("GET", url, params=params)
+
+    async def post(
+        self,
+        url: str,
+        *,
+        json: Any = None,
+        data: Any = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> aiohttp.ClientResponse:
+        return await self._request("POST", url, json=json, data=data, headers=headers)
+
+    async def _request(
+        self, method: str, url: str, params: Mapping[str, str] | None = None, **kwargs
+    ) -> aiohttp.ClientResponse:
+        started = time.perf_counter()
+        response = await self._session.request(method, url, params=params, **kwargs)
+        # The body is cached on the response, so callers can still read it
+        body = await response.text()
+        self._exchanges.append(
+            record_exchange(
+                method,
+                url,
+                params,
+                response.status,
+                response.url,
+                response.content_type,
+                body,
+                time.perf_counter() - started,
+            )
+        )
+        return response
+
+
+class ReplayResponse:
+    def __init__(self, exchange: Exchange):
+        self.status: int = exchange["status"]
+        self.url = URL(exchange["url"])
+        self.content_type: str = exchange["content_type"]
+        self._method: str = exchange["method"]
+        self._body: str = exchange["body"]
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(
+                    self.url, self._method, CIMultiDictProxy(CIMultiDict()), self.url
+                ),
+                (),
+                status=self.status,
+            )
+
+    async def text(self) -> str:
+        return self._body
+
+    async def json(self) -> Any:
+        return json.loads(self._body)
+
+
+class ReplaySession:
+    """Serves recorded exchanges in order, waiting as long as the original request took.
+
+    Requests are matched on method and sanitized URL, falling back to the path
+    alone so a fixture recorded on one day can be replayed for another. When a
+    match has been served already, the last recorded response is repeated.
+    """
+
+    def __init__(self, exchanges: list[Exchange], speed: float = 1.0):
+        self._speed = speed
+        self._by_key: dict[str, deque[Exchange]] = {}
+        self._by_path: dict[str, deque[Exchange]] = {}
+        for exchange in exchanges:
+            key = f"{exchange['method']} {exchange['key']}"
+            path = f"{exchange['method']} {_path_key(exchange['key'])}"
+            self._by_key.setdefault(key, deque()).append(exchange)
+            self._by_path.setdefault(path, deque()).append(exchange)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def get(
+        self, url: str, *, params: Mapping[str, str] | None = None
+    ) -> ReplayResponse:
+        return await self._request("GET", url, params)
+
+    async def post(
+        self,
+        url: str,
+        *,
+        json: Any = None,
+        data: Any = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> ReplayResponse:
+        return await self._request("POST", url)
+
+    async def _request(
+        self, method: str, url: str, params: Mapping[str, str] | None = None
+    ) -> ReplayResponse:
+        key = _request_key(url, params)
+        queue = self._by_key.get(f"{method} {key}") or self._by_path.get(
+            f"{method} {_path_key(key)}"
+        )
+        if not queue:
+            raise aiohttp.ClientConnectionError(
+                f"No recorded exchange for {method} {key}"
+            )
+        exchange = queue.popleft() if len(queue) > 1 else queue[0]
+        await asyncio.sleep(exchange["elapsed"] * self._speed)
+        return ReplayResponse(exchange)
+
+
+def recording_session_factory(path: str) -> Callable[[], Session]:
+    """Session factory for `GreenchoiceApi` that records all traffic to `path`."""
+    exchanges: list[Exchange] = []
+    return lambda: RecordingSession(path, exchanges)
+
+
+def replay_session_factory(path: str, speed: float = 1.0) -> Callable[[], Session]:
+    """Session factory for `GreenchoiceApi` that replays the traffic recorded in `path`.
+
+    `speed` scales the recorded response times, 0 replays without waiting.
+    """
+    exchanges = load_fixtures(path)
+    return lambda: ReplaySession(exchanges, speed)
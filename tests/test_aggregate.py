@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+
+from custom_components.greenchoice.aggregate import _reduce, aggregate, spread
+from custom_components.greenchoice.const import TIMEZONE
+from custom_components.greenchoice.importer import STATS
+
+from .common import reading
+
+
+def quarter(minute: int, electricity: float | None = 1.0, gas: float | None = 0.5):
+    return reading(datetime(2025, 1, 1, 10, minute), electricity, gas)
+
+
+def test_reduce_sums_numbers_and_combines_flags():
+    combined = _reduce([quarter(0, 1.0, 0.5), quarter(15, 2.0, 0.5)])
+
+    assert combined.electricity is not None
+    assert combined.electricity.total_delivery_consumption == 3.0
+    assert combined.electricity.total_delivery_costs == pytest.approx(0.75)
+    assert combined.electricity.delivery_low_consumption is None
+    assert combined.electricity.has_consumption
+    assert combined.gas is not None
+    assert combined.gas.delivery_consumption == 1.0
+    assert combined.gas.has_consumption
+
+
+def test_partly_published_hour_is_not_published():
+    # Gas is published for only half of the hour
+    quarters = [quarter(0), quarter(15), quarter(30, gas=None), quarter(45, gas=None)]
+
+    (combined,) = aggregate(quarters, 60, 4)
+
+    assert combined.electricity is not None
+    assert combined.electricity.has_consumption
+    assert combined.gas is not None
+    assert not combined.gas.has_consumption
+    gas = next(stat for stat in STATS if stat.product_type == "gas")
+    assert gas.get_value(combined) is None
+    assert not gas.is_imported(combined)
+
+
+def test_reduce_applies_factor():
+    scaled = _reduce([quarter(0, 3.0, 1.5)], 1 / 3)
+
+    assert scaled.electricity is not None
+    assert scaled.electricity.total_delivery_consumption == pytest.approx(1.0)
+    assert scaled.gas is not None
+    assert scaled.gas.delivery_consumption == pytest.approx(0.5)
+    assert scaled.has_consumption
+
+
+def test_aggregate_quarters_to_hours():
+    entries = [quarter(m) for m in (45, 0, 30, 15)] + [
+        reading(datetime(2025, 1, 1, 11, 0), 4.0, 2.0)
+    ]
+
+    hours = aggregate(entries, 60)
+
+    assert [h.consumed_on for h in hours] == [
+        datetime(2025, 1, 1, 10, tzinfo=TIMEZONE),
+        datetime(2025, 1, 1, 11, tzinfo=TIMEZONE),
+    ]
+    assert hours[0].electricity is not None
+    assert hours[0].electricity.total_delivery_consumption == 4.0
+    assert hours[0].gas is not None
+    assert hours[0].gas.delivery_consumption == 2.0
+    # A single reading in a bucket is passed through
+    assert hours[1].electricity is not None
+    assert hours[1].electricity.total_delivery_consumption == 4.0
+
+
+def test_aggregate_leaves_out_incomplete_buckets():
+    # The last two quarters of 10:00 are not in the response yet
+    entries = [quarter(0), quarter(15)] + [
+        reading(datetime(2025, 1, 1, 11, m)) for m in (0, 15, 30, 45)
+    ]
+
+    hours = aggregate(entries, 60, 4)
+
+    assert [h.consumed_on.hour for h in hours] == [11]
+
+
+def test_spread_quarters_over_five_minute_slots():
+    slots = spread([quarter(0, 3.0, 1.5), quarter(15, 6.0, 0.0)], 15, 5)
+
+    assert [slot.consumed_on.minute for slot in slots] == [0, 5, 10, 15, 20, 25]
+    usage = [slot.electricity.total_delivery_consumption for slot in slots]  # type: ignore[union-attr]
+    assert usage == pytest.approx([1.0, 1.0, 1.0, 2.0, 2.0, 2.0])
+    assert sum(usage) == pytest.approx(9.0)
+
+
+def test_spread_combines_readings_shorter_than_a_slot():
+    minutes = [reading(datetime(2025, 1, 1, 10, m), 1.0, None) for m in range(10)]
+
+    slots = spread(minutes, 1, 5)
+
+    assert [slot.consumed_on.minute for slot in slots] == [0, 5]
+    assert [slot.electricity.total_delivery_consumption for slot in slots] == [  # type: ignore[union-attr]
+        5.0,
+        5.0,
+    ]
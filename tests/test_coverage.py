@@ -0,0 +1,80 @@
+from datetime import UTC, date, datetime, timedelta
+from unittest.mock import MagicMock
+
+from custom_components.greenchoice.api import ProfileId
+from custom_components.greenchoice.const import TIMEZONE
+from custom_components.greenchoice.coverage import CoverageIndex, expected_mask
+
+SPRING_FORWARD = date(2025, 3, 30)
+FALL_BACK = date(2025, 10, 26)
+
+
+def hours_of(day: date) -> list[datetime]:
+    """Every hour of the local `day`, as the API returns them."""
+    start = datetime(day.year, day.month, day.day, tzinfo=TIMEZONE).astimezone(UTC)
+    hours = []
+    moment = start
+    while moment.astimezone(TIMEZONE).date() == day:
+        hours.append(moment.astimezone(TIMEZONE))
+        moment += timedelta(hours=1)
+    return hours
+
+
+def make_index() -> CoverageIndex:
+    return CoverageIndex(MagicMock(), ProfileId(customer_number=1, agreement_id=2))
+
+
+def test_expected_mask():
+    assert expected_mask(date(2025, 6, 1)) == (1 << 24) - 1
+    # 02:00 does not exist when the clocks go forward
+    assert len(hours_of(SPRING_FORWARD)) == 23
+    assert expected_mask(SPRING_FORWARD) == ((1 << 24) - 1) & ~(1 << 2)
+    # 02:00 happens twice when the clocks go back, which is still one local hour
+    assert len(hours_of(FALL_BACK)) == 25
+    assert expected_mask(FALL_BACK) == (1 << 24) - 1
+
+
+def test_complete_days_are_not_missing():
+    index = make_index()
+    days = [date(2025, 6, 1), SPRING_FORWARD, FALL_BACK]
+    for day in days:
+        for moment in hours_of(day):
+            index.mark("a", moment)
+
+    assert index.missing_days(["a"], days) == []
+
+
+def test_days_with_a_missing_hour_are_missing():
+    index = make_index()
+    days = [SPRING_FORWARD, date(2025, 3, 31), FALL_BACK]
+    for day in days:
+        for moment in hours_of(day)[:-1]:
+            index.mark("a", moment)
+    # The hour that is missing on the last day
+    index.mark("a", hours_of(date(2025, 3, 31))[-1])
+
+    assert index.missing_days(["a"], days) == [SPRING_FORWARD, FALL_BACK]
+
+
+def test_day_is_missing_when_any_series_is_incomplete():
+    index = make_index()
+    day = date(2025, 6, 1)
+    for moment in hours_of(day):
+        index.mark("a", moment)
+    for moment in hours_of(day)[1:]:
+        index.mark("b", moment)
+
+    assert index.missing_days(["a"], [day]) == []
+    assert index.missing_days(["a", "b"], [day]) == [day]
+    assert not index.is_covered("b", hours_of(day)[0])
+
+
+def test_prune_forgets_old_days():
+    index = make_index()
+    index.mark("a", datetime(2025, 6, 1, 12, tzinfo=TIMEZONE))
+    index.mark("a", datetime(2025, 6, 2, 12, tzinfo=TIMEZONE))
+
+    index.prune(date(2025, 6, 2))
+
+    assert not index.is_covered("a", datetime(2025, 6, 1, 12, tzinfo=TIMEZONE))
+    assert index.is_covered("a", datetime(2025, 6, 2, 12, tzinfo=TIMEZONE))
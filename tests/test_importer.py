@@ -0,0 +1,441 @@
+import asyncio
+from collections.abc import Callable
+from datetime import UTC, date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.greenchoice.api import ProfileId
+from custom_components.greenchoice.const import TIMEZONE
+from custom_components.greenchoice.error import GreenchoiceError, RequestRejectedError
+from custom_components.greenchoice import importer as importer_module
+from custom_components.greenchoice.aggregate import aggregate
+from custom_components.greenchoice.importer import (
+    STATS,
+    GreenchoiceImporter,
+    LastStat,
+    StoredStat,
+    plan_statistics,
+)
+from custom_components.greenchoice.model import Consumption
+
+from .common import reading
+
+START = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def hour(n: int) -> datetime:
+    return START + timedelta(hours=n)
+
+
+def stored(states: dict[int, float], base: float = 100.0) -> list[StoredStat]:
+    """Stored rows for the given hours, with consistent sums starting from `base`."""
+    rows = []
+    running = base
+    for n in sorted(states):
+        running += states[n]
+        rows.append(StoredStat(hour(n), states[n], running))
+    return rows
+
+
+def apply(
+    rows: list[StoredStat],
+    values: dict[datetime, float],
+    last_sum: float | None = None,
+) -> dict[datetime, tuple[float, float]]:
+    """Plan `values` against `rows` and apply the plan like the recorder would."""
+    if last_sum is None:
+        last_sum = rows[-1].sum if rows else 0.0
+    statistics, adjustments = plan_statistics(values, rows, last_sum)
+    series = {row.start: (row.state, row.sum) for row in rows}
+    # The recorder runs the queued adjustments before the write
+    for start, adjustment in adjustments:
+        for moment, (state, _sum) in series.items():
+            if moment >= start:
+                series[moment] = (state, _sum + adjustment)
+    for statistic in statistics:
+        series[statistic["start"]] = (statistic["state"], statistic["sum"])
+    return dict(sorted(series.items()))
+
+
+def assert_consistent(series: dict[datetime, tuple[float, float]], base: float):
+    running = base
+    for moment, (state, _sum) in series.items():
+        running += state
+        assert _sum == pytest.approx(running), moment
+
+
+def test_gap_in_middle_of_stored_rows():
+    rows = stored({0: 1, 1: 1, 4: 1, 5: 1})
+    statistics, adjustments = plan_statistics(
+        {hour(2): 2, hour(3): 3}, rows, rows[-1].sum
+    )
+
+    assert [(s["start"], s["state"], s["sum"]) for s in statistics] == [
+        (hour(2), 2, 104),
+        (hour(3), 3, 107),
+    ]
+    assert adjustments == [(hour(4), 5)]
+
+    series = apply(rows, {hour(2): 2, hour(3): 3})
+    assert list(series) == [hour(n) for n in range(6)]
+    assert_consistent(series, 100)
+
+
+def test_hour_before_first_stored_row():
+    rows = stored({2: 1, 3: 1})
+    statistics, adjustments = plan_statistics({hour(0): 4}, rows, rows[-1].sum)
+
+    assert [(s["start"], s["sum"]) for s in statistics] == [(hour(0), 104)]
+    assert adjustments == [(hour(2), 4)]
+    assert_consistent(apply(rows, {hour(0): 4}), 100)
+
+
+def test_several_separate_runs():
+    rows = stored({0: 1, 2: 1, 4: 1, 6: 1})
+    values = {hour(1): 2, hour(3): 3, hour(5): 4}
+    _, adjustments = plan_statistics(values, rows, rows[-1].sum)
+
+    assert adjustments == [(hour(2), 2), (hour(4), 3), (hour(6), 4)]
+    series = apply(rows, values)
+    assert len(series) == 7
+    assert_consistent(series, 100)
+
+
+def test_new_hours_after_last_stored_row_need_no_adjustment():
+    rows = stored({0: 1, 1: 1})
+    statistics, adjustments = plan_statistics(
+        {hour(2): 2, hour(3): 3}, rows, rows[-1].sum
+    )
+
+    assert adjustments == []
+    assert [s["sum"] for s in statistics] == [104, 107]
+
+
+def test_no_stored_rows_continues_from_last_sum():
+    statistics, adjustments = plan_statistics({hour(0): 2, hour(1): 3}, [], 50)
+
+    assert adjustments == []
+    assert [s["sum"] for s in statistics] == [52, 55]
+
+
+def test_refresh_writes_only_changed_hours():
+    rows = stored({0: 1, 1: 1, 2: 1, 3: 1, 4: 1})
+    values = {hour(n): 1.0 for n in range(5)} | {hour(1): 3, hour(3): 0.5}
+    statistics, adjustments = plan_statistics(values, rows, rows[-1].sum)
+
+    assert [s["start"] for s in statistics] == [hour(1), hour(3)]
+    assert adjustments == [(hour(2), 2), (hour(4), -0.5)]
+    # The changed hour after the first adjustment includes it in its sum
+    assert statistics[1]["sum"] == pytest.approx(101 + 3 + 1 + 0.5)
+
+    series = apply(rows, values)
+    assert [state for state, _ in series.values()] == [1, 3, 1, 0.5, 1]
+    assert_consistent(series, 100)
+
+
+def test_refresh_with_contiguous_changes_uses_one_adjustment():
+    rows = stored({0: 1, 1: 1, 2: 1, 3: 1})
+    values = {hour(1): 2, hour(2): 2}
+    _, adjustments = plan_statistics(values, rows, rows[-1].sum)
+
+    assert adjustments == [(hour(3), 2)]
+    assert_consistent(apply(rows, values), 100)
+
+
+def test_unchanged_and_empty_hours_are_not_written():
+    rows = stored({0: 1, 1: 1})
+    statistics, adjustments = plan_statistics(
+        {hour(0): 1, hour(1): 1.0000000001, hour(2): 0}, rows, rows[-1].sum
+    )
+
+    assert statistics == []
+    assert adjustments == []
+
+
+def test_is_imported_waits_for_unpublished_products():
+    moment = datetime(2025, 1, 1, 10)
+    electricity = next(s for s in STATS if s.product_type == "electricity")
+    gas = next(s for s in STATS if s.product_type == "gas")
+
+    published = reading(moment)
+    assert electricity.is_imported(published)
+    assert gas.is_imported(published)
+
+    gas_late = reading(moment, gas=None)
+    assert electricity.is_imported(gas_late)
+    assert not gas.is_imported(gas_late)
+
+    # Without a gas connection there is nothing to wait for
+    assert gas.is_imported(reading(moment, has_gas=False))
+
+
+class FakeApi:
+    """Answers `get_readings` per interval with a response or an error."""
+
+    def __init__(self, responses: dict):
+        self.responses = responses
+        self.requested: list[str] = []
+
+    async def get_readings(self, profile, day, interval):
+        self.requested.append(interval)
+        response = self.responses[interval]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def consumption(interval: str, has_consumption: bool = True) -> Consumption:
+    return Consumption.model_validate(
+        {
+            "interval": interval,
+            "start": "2025-01-01T00:00:00",
+            "end": "2025-01-02T00:00:00",
+            "consumptionCosts": [
+                reading(datetime(2025, 1, 1, 10)).model_dump(by_alias=True)
+            ],
+            "hasConsumption": has_consumption,
+        }
+    )
+
+
+def make_importer(api: FakeApi) -> GreenchoiceImporter:
+    return GreenchoiceImporter(
+        hass=MagicMock(),
+        api=api,  # type: ignore[arg-type]
+        name="Home",
+        profile=ProfileId(customer_number=1, agreement_id=2),
+    )
+
+
+def get_readings(importer: GreenchoiceImporter) -> Consumption:
+    return asyncio.run(importer.get_readings(date(2025, 1, 1)))
+
+
+def test_get_readings_prefers_finer_interval():
+    api = FakeApi({"quarterHour": consumption("quarterHour")})
+    importer = make_importer(api)
+
+    assert get_readings(importer).interval == "quarterHour"
+    assert get_readings(importer).interval == "quarterHour"
+    assert api.requested == ["quarterHour", "quarterHour"]
+
+
+def test_get_readings_falls_back_when_interval_is_rejected():
+    api = FakeApi({"quarterHour": RequestRejectedError(), "hour": consumption("hour")})
+    importer = make_importer(api)
+
+    assert get_readings(importer).interval == "hour"
+    get_readings(importer)
+    assert api.requested == ["quarterHour", "hour", "hour"]
+
+
+def test_get_readings_falls_back_when_interval_is_ignored():
+    # An API that does not know the interval and answers with hourly data
+    api = FakeApi({"quarterHour": consumption("hour"), "hour": consumption("hour")})
+    importer = make_importer(api)
+
+    assert get_readings(importer).interval == "hour"
+    get_readings(importer)
+    assert api.requested == ["quarterHour", "hour", "hour"]
+
+
+def test_get_readings_does_not_fall_back_on_transient_errors():
+    api = FakeApi({"quarterHour": GreenchoiceError(), "hour": consumption("hour")})
+    importer = make_importer(api)
+
+    with pytest.raises(GreenchoiceError):
+        get_readings(importer)
+
+    api.responses["quarterHour"] = consumption("quarterHour")
+    assert get_readings(importer).interval == "quarterHour"
+
+
+def test_get_readings_does_not_pick_interval_without_data():
+    api = FakeApi(
+        {
+            "quarterHour": consumption("quarterHour", has_consumption=False),
+            "hour": consumption("hour", has_consumption=False),
+        }
+    )
+    importer = make_importer(api)
+
+    assert not get_readings(importer).has_consumption
+    api.responses["quarterHour"] = consumption("quarterHour")
+    assert get_readings(importer).interval == "quarterHour"
+
+
+def test_clear_data_forgets_recent_readings():
+    importer = make_importer(FakeApi({}))
+    importer._coverage = MagicMock(async_save=AsyncMock())
+    importer._recent = MagicMock(async_clear=AsyncMock())
+    listener = MagicMock()
+    importer.async_add_listener(listener)
+
+    asyncio.run(importer.clear_data())
+
+    importer._coverage.clear.assert_called_once()
+    importer._recent.async_clear.assert_awaited_once()
+    listener.assert_called_once()
+
+
+def test_refresh_writes_reported_zero_but_skips_missing_values(monkeypatch):
+    added = MagicMock()
+    recorder = MagicMock()
+    monkeypatch.setattr(importer_module, "async_add_external_statistics", added)
+    monkeypatch.setattr(importer_module, "get_instance", lambda hass: recorder)
+    importer = make_importer(FakeApi({}))
+    stat = next(s for s in STATS if s.unique_id == "electricity_consumption_total")
+    data = [
+        reading(datetime(2025, 1, 1, 10), electricity=0.0),
+        reading(datetime(2025, 1, 1, 11), electricity=None),
+        reading(datetime(2025, 1, 1, 12), has_electricity=False),
+    ]
+    rows = [
+        StoredStat(entry.consumed_on, 1.0, 101.0 + n) for n, entry in enumerate(data)
+    ]
+
+    importer.import_stat_values(stat, data, LastStat(None, 103.0), rows, {}, True)
+
+    statistics = added.call_args.args[2]
+    assert [(s["start"], s["state"]) for s in statistics] == [
+        (data[0].consumed_on, 0.0)
+    ]
+    # The stored hour after the zero shifts by the value it replaced
+    recorder.async_adjust_statistics.assert_called_once_with(
+        stat.statistic_id(importer.profile), data[1].consumed_on, -1.0, stat.unit
+    )
+
+
+def test_import_skips_partly_published_hours(monkeypatch):
+    added = MagicMock()
+    monkeypatch.setattr(importer_module, "async_add_external_statistics", added)
+    importer = make_importer(FakeApi({}))
+    importer._coverage = MagicMock(is_covered=MagicMock(return_value=False))
+    quarters = [
+        reading(datetime(2025, 1, 1, 10, m), gas=None if m >= 30 else 0.5)
+        for m in (0, 15, 30, 45)
+    ]
+    (hour_data,) = aggregate(quarters, 60, 4)
+
+    written = set()
+    for stat in STATS:
+        added.reset_mock()
+        importer.import_stat_values(stat, [hour_data], LastStat(None, 0.0), [], {})
+        if added.called:
+            written.add(stat.unique_id)
+
+    assert written == {
+        "electricity_consumption_high",
+        "electricity_consumption_total",
+        "electricity_cost_total",
+    }
+
+
+class FakeRecorder:
+    """Keeps stored rows per statistic, queued writes apply once drained."""
+
+    def __init__(self, rows: dict[str, list[StoredStat]]):
+        self.rows = {
+            stat_id: {row.start: row for row in stat_rows}
+            for stat_id, stat_rows in rows.items()
+        }
+        self.queue: list[Callable[[], None]] = []
+
+    def async_add_external_statistics(self, hass, metadata, statistics):
+        def write():
+            series = self.rows.setdefault(metadata["statistic_id"], {})
+            for statistic in statistics:
+                series[statistic["start"]] = StoredStat(
+                    statistic["start"], statistic["state"], statistic["sum"]
+                )
+
+        self.queue.append(write)
+
+    def async_adjust_statistics(self, statistic_id, start, adjustment, unit):
+        def adjust():
+            series = self.rows.get(statistic_id, {})
+            for moment, row in series.items():
+                if moment >= start:
+                    series[moment] = row._replace(sum=row.sum + adjustment)
+
+        self.queue.append(adjust)
+
+    async def async_block_till_done(self):
+        while self.queue:
+            self.queue.pop(0)()
+
+    def stored(self, statistic_id: str, start: datetime) -> list[StoredStat]:
+        series = self.rows.get(statistic_id, {})
+        return [series[moment] for moment in sorted(series) if moment >= start]
+
+
+def test_back_to_back_refreshes_adjust_once(monkeypatch):
+    stat = next(s for s in STATS if s.unique_id == "electricity_consumption_total")
+    importer = make_importer(FakeApi({}))
+    stat_id = stat.statistic_id(importer.profile)
+    day = date(2025, 1, 1)
+    hours = [
+        datetime(2025, 1, 1, tzinfo=TIMEZONE) + timedelta(hours=n) for n in range(25)
+    ]
+    # Every hour of the day was stored as 1.0, the next day has started
+    recorder = FakeRecorder(
+        {
+            stat_id: [
+                StoredStat(moment, 1.0, 101.0 + n) for n, moment in enumerate(hours)
+            ]
+        }
+    )
+    monkeypatch.setattr(importer_module, "get_instance", lambda hass: recorder)
+    monkeypatch.setattr(
+        importer_module,
+        "async_add_external_statistics",
+        recorder.async_add_external_statistics,
+    )
+
+    async def get_last_stats():
+        last = {}
+        for s in STATS:
+            rows = recorder.stored(s.statistic_id(importer.profile), hours[0])
+            last[s] = (
+                LastStat(rows[-1].start, rows[-1].sum) if rows else LastStat(None, 0.0)
+            )
+        return last
+
+    async def get_stored_stats(start):
+        return {
+            s: recorder.stored(s.statistic_id(importer.profile), start) for s in STATS
+        }
+
+    importer.get_last_stats = get_last_stats  # type: ignore[method-assign]
+    importer.get_stored_stats = get_stored_stats  # type: ignore[method-assign]
+    importer._coverage = MagicMock()
+    importer._recent = MagicMock(update=MagicMock(return_value=False))
+    importer._interval = "hour"
+    # The refreshed day reports 2.0 for every hour
+    importer._api.responses["hour"] = Consumption.model_validate(
+        {
+            "interval": "hour",
+            "start": "2025-01-01T00:00:00",
+            "end": "2025-01-02T00:00:00",
+            "consumptionCosts": [
+                reading(moment.replace(tzinfo=None), electricity=2.0).model_dump(
+                    by_alias=True
+                )
+                for moment in hours[:24]
+            ],
+            "hasConsumption": True,
+        }
+    )
+
+    async def run():
+        # The second refresh starts before the recorder committed the first
+        await importer._import_days([day], refresh=True)
+        await importer._import_days([day], refresh=True)
+        await recorder.async_block_till_done()
+
+    asyncio.run(run())
+
+    rows = recorder.stored(stat_id, hours[0])
+    assert [row.state for row in rows] == [2.0] * 24 + [1.0]
+    assert_consistent({row.start: (row.state, row.sum) for row in rows}, 100)
@@ -0,0 +1,33 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+
+from custom_components.greenchoice import ATTR_DAYS, async_setup
+from custom_components.greenchoice.error import GreenchoiceError
+
+
+def make_entry(title: str, error: Exception | None = None) -> MagicMock:
+    entry = MagicMock(title=title, state=ConfigEntryState.LOADED)
+    entry.runtime_data.async_refresh = AsyncMock(side_effect=error)
+    return entry
+
+
+def test_refresh_continues_after_a_failed_agreement():
+    entries = [
+        make_entry("Home", GreenchoiceError("timeout")),
+        make_entry("Office"),
+        make_entry("Cabin", GreenchoiceError("timeout")),
+    ]
+    hass = MagicMock()
+    hass.config_entries.async_entries.return_value = entries
+    asyncio.run(async_setup(hass, {}))
+    refresh = hass.services.async_register.call_args.args[2]
+
+    with pytest.raises(HomeAssistantError, match="Refreshing Home, Cabin failed"):
+        asyncio.run(refresh(MagicMock(data={ATTR_DAYS: 3})))
+
+    for entry in entries:
+        entry.runtime_data.async_refresh.assert_awaited_once_with(3)
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from custom_components.greenchoice.api import ProfileId
+from custom_components.greenchoice.importer import STATS
+from custom_components.greenchoice.recent import RecentReadings
+
+from .common import reading
+
+ELECTRICITY = "electricity_consumption_total"
+GAS = "gas_consumption_total"
+
+
+def hours(start: datetime, count: int, electricity: float = 1.0, gas: float = 0.5):
+    return [reading(start + timedelta(hours=n), electricity, gas) for n in range(count)]
+
+
+def make_recent(size: int = 24 * 62) -> RecentReadings:
+    recent = RecentReadings(
+        MagicMock(), ProfileId(customer_number=1, agreement_id=2), STATS, size
+    )
+    recent._store = MagicMock(async_save=AsyncMock())
+    return recent
+
+
+def test_update_appends_and_adds_to_totals():
+    recent = make_recent()
+
+    assert recent.update(hours(datetime(2025, 6, 1, 0), 3))
+    assert recent.update(hours(datetime(2025, 6, 1, 3), 2, gas=1.0))
+
+    assert recent.latest is not None
+    assert recent.latest.consumed_on.hour == 4
+    assert recent.day == date(2025, 6, 1)
+    assert recent.day_totals[ELECTRICITY] == 5.0
+    assert recent.day_totals[GAS] == 3.5
+    assert recent.month_totals == recent.day_totals
+    recent._store.async_delay_save.assert_called()
+
+
+def test_update_without_entries_changes_nothing():
+    recent = make_recent()
+
+    assert not recent.update([])
+    recent._store.async_delay_save.assert_not_called()
+
+
+def test_older_and_corrected_hours_are_merged():
+    recent = make_recent()
+    recent.update(hours(datetime(2025, 6, 1, 0), 2) + hours(datetime(2025, 6, 1, 4), 2))
+
+    # A refilled gap and a corrected hour arrive after later hours
+    recent.update(
+        hours(datetime(2025, 6, 1, 2), 2, electricity=2.0)
+        + hours(datetime(2025, 6, 1, 5), 1, electricity=3.0)
+    )
+
+    starts = [entry.consumed_on.hour for entry in recent._readings]
+    assert starts == [0, 1, 2, 3, 4, 5]
+    assert recent.day_totals[ELECTRICITY] == 1 + 1 + 2 + 2 + 1 + 3
+    assert recent.month_totals[ELECTRICITY] == recent.day_totals[ELECTRICITY]
+
+
+def test_totals_roll_over_with_day_and_month():
+    recent = make_recent()
+    recent.update(hours(datetime(2025, 5, 30, 22), 4))
+
+    assert recent.day == date(2025, 5, 31)
+    assert recent.day_totals[ELECTRICITY] == 2.0
+    assert recent.month == date(2025, 5, 1)
+    assert recent.month_totals[ELECTRICITY] == 4.0
+
+    recent.update(hours(datetime(2025, 5, 31, 23), 2))
+
+    assert recent.day == date(2025, 6, 1)
+    assert recent.day_totals[ELECTRICITY] == 1.0
+    assert recent.month == date(2025, 6, 1)
+    assert recent.month_totals[ELECTRICITY] == 1.0
+
+
+def test_rebuild_after_rollover_only_counts_latest_day_and_month():
+    recent = make_recent()
+    recent.update(hours(datetime(2025, 5, 31, 22), 4))
+
+    recent.update(hours(datetime(2025, 5, 31, 22), 1, electricity=5.0))
+
+    assert recent.day == date(2025, 6, 1)
+    assert recent.day_totals[ELECTRICITY] == 2.0
+    assert recent.month_totals[ELECTRICITY] == 2.0
+
+
+def test_oldest_readings_are_evicted():
+    recent = make_recent(size=3)
+    recent.update(hours(datetime(2025, 6, 1, 0), 5))
+
+    assert [entry.consumed_on.hour for entry in recent._readings] == [2, 3, 4]
+    assert recent.latest is not None
+    assert recent.latest.consumed_on.hour == 4
+
+
+def test_clear_forgets_readings_and_stored_copy():
+    recent = make_recent()
+    recent.update(hours(datetime(2025, 6, 1, 0), 3))
+
+    asyncio.run(recent.async_clear())
+
+    assert recent.latest is None
+    assert recent.day is None
+    assert recent.month is None
+    assert recent.day_totals == {}
+    assert recent.month_totals == {}
+    recent._store.async_save.assert_awaited_once_with([])
+
+
+def test_load_restores_readings_and_totals():
+    saved = make_recent()
+    saved.update(hours(datetime(2025, 6, 1, 0), 3))
+    recent = make_recent()
+    recent._store.async_load = AsyncMock(return_value=saved._save_data())
+
+    asyncio.run(recent.async_load())
+
+    assert recent.latest == saved.latest
+    assert recent.day_totals == saved.day_totals
+    assert recent.month_totals == saved.month_totals
@@ -0,0 +1,243 @@
+import asyncio
+from datetime import date
+import gzip
+import json
+
+import aiohttp
+import pytest
+
+from custom_components.greenchoice.api import GreenchoiceApi, ProfileId
+from custom_components.greenchoice.const import BASE_URL, SSO_URL
+
+from .recording import (
+    REDACTED,
+    ReplaySession,
+    save_fixtures,
+    record_exchange,
+    replay_session_factory,
+)
+
+SECRETS = [
+    "secret-token",
+    "secret-code",
+    "secret-state",
+    "secret-session",
+    "jan@example.com",
+    "Kerkstraat",
+    "1234 AB",
+    "123456",
+    "7654321",
+    "Welcome Jan",
+]
+
+OIDC_PAGE = """
+<html><body>
+  <p>Welcome Jan, jan@example.com</p>
+  <form method="post">
+    <input type="hidden" name="code" value="secret-code">
+    <input type="hidden" name="scope" value="openid profile">
+    <input type="hidden" name="state" value="secret-state">
+    <input type="hidden" name="session_state" value="secret-session">
+    <input type="hidden" name="email" value="jan@example.com">
+  </form>
+</body></html>
+"""
+
+PROFILES = [
+    {
+        "customerNumber": 123456,
+        "agreementId": 7654321,
+        "street": "Kerkstraat",
+        "houseNumber": 12,
+        "postalCode": "1234 AB",
+        "email": "jan@example.com",
+        "energySupplyStatus": "Active",
+    }
+]
+
+
+def consumption_body() -> str:
+    hours = [
+        {
+            "consumedOn": f"2025-01-01T{hour:02d}:00:00",
+            "electricity": {
+                "deliveryLowConsumption": None,
+                "deliveryLowCosts": None,
+                "deliveryNormalConsumption": 0.5,
+                "deliveryNormalCosts": 0.125,
+                "fixedDeliveryCosts": None,
+                "gridOperatorCosts": None,
+                "totalFixedCosts": None,
+                "totalDeliveryCosts": 0.125,
+                "totalDeliveryConsumption": 0.5,
+                "hasConsumption": True,
+                "meterNumber": "7654321",
+            },
+            "gas": None,
+            "hasConsumption": True,
+        }
+        for hour in range(24)
+    ]
+    return json.dumps(
+        {
+            "interval": "hour",
+            "start": "2025-01-01T00:00:00",
+            "end": "2025-01-02T00:00:00",
+            "consumptionCosts": hours,
+            "hasConsumption": True,
+            "customerNumber": 123456,
+        }
+    )
+
+
+def exchanges() -> list[dict]:
+    """The traffic of a login, a profile lookup and a day of readings."""
+    json_type = "application/json"
+    html_type = "text/html"
+    consumptions = f"{BASE_URL}/api/v2/customers/123456/agreements/7654321/consumptions"
+    return [
+        record_exchange(
+            "GET",
+            f"{SSO_URL}/api/antiforgery",
+            None,
+            200,
+            f"{SSO_URL}/api/antiforgery",
+            json_type,
+            json.dumps({"requestToken": "secret-token", "user": "jan@example.com"}),
+            0.01,
+        ),
+        record_exchange(
+            "GET",
+            BASE_URL,
+            None,
+            200,
+            f"{SSO_URL}/login?ReturnUrl=%2Fconnect%3Fstate%3Dsecret-state",
+            html_type,
+            "<html><body>Welcome Jan</body></html>",
+            0.01,
+        ),
+        record_exchange(
+            "POST",
+            f"{SSO_URL}/api/login",
+            None,
+            200,
+            f"{SSO_URL}/api/login",
+            json_type,
+            json.dumps(
+                {
+                    "redirectUri": "/connect/callback?state=secret-state&code=secret-code",
+                    "validationProblemDetails": None,
+                    "email": "jan@example.com",
+                }
+            ),
+            0.01,
+        ),
+        record_exchange(
+            "GET",
+            f"{SSO_URL}/connect/callback?state=secret-state&code=secret-code",
+            None,
+            200,
+            f"{SSO_URL}/connect/callback?state=secret-state&code=secret-code",
+            html_type,
+            OIDC_PAGE,
+            0.01,
+        ),
+        record_exchange(
+            "POST",
+            f"{BASE_URL}/signin-oidc",
+            None,
+            200,
+            f"{BASE_URL}/",
+            html_type,
+            "<html><body>Welcome Jan</body></html>",
+            0.01,
+        ),
+        record_exchange(
+            "GET",
+            f"{BASE_URL}/api/v2/profiles",
+            None,
+            200,
+            f"{BASE_URL}/api/v2/profiles",
+            json_type,
+            json.dumps(PROFILES),
+            0.01,
+        ),
+        record_exchange(
+            "GET",
+            consumptions,
+            {"interval": "hour", "start": "2025-01-01", "end": "2025-01-02"},
+            200,
+            f"{consumptions}?interval=hour&start=2025-01-01&end=2025-01-02",
+            json_type,
+            consumption_body(),
+            0.01,
+        ),
+    ]
+
+
+def test_sanitized_archive_holds_no_secrets(tmp_path):
+    path = tmp_path / "fixtures.json.gz"
+    save_fixtures(str(path), exchanges())
+
+    with gzip.open(path, "rt") as archive:
+        content = archive.read()
+    for secret in SECRETS:
+        assert secret not in content
+
+    oidc_page = exchanges()[3]["body"]
+    assert "email" not in oidc_page
+    for name in ("code", "scope", "state", "session_state"):
+        assert f'name="{name}" value="{REDACTED}"' in oidc_page
+    # Pages the login does not read are not kept at all
+    assert exchanges()[1]["body"] == ""
+
+
+def test_replay_login_profiles_and_readings(tmp_path):
+    path = tmp_path / "fixtures.json.gz"
+    save_fixtures(str(path), exchanges())
+    api = GreenchoiceApi(
+        "user", "password", session_factory=replay_session_factory(str(path), 0)
+    )
+
+    async def run():
+        async with api:
+            await api.login()
+            profiles = await api.get_profiles()
+            # Recorded for another day, served through the path fallback
+            readings = await api.get_readings(
+                ProfileId.from_profile(profiles[0]), date(2025, 2, 1), "hour"
+            )
+        return profiles, readings
+
+    profiles, readings = asyncio.run(run())
+
+    assert len(profiles) == 1
+    assert profiles[0].agreement_id == 0
+    assert profiles[0].street == REDACTED
+    assert profiles[0].energy_supply_status == "Active"
+    assert readings.has_consumption
+    assert len(readings.consumption_costs) == 24
+    assert readings.consumption_costs[0].electricity is not None
+    assert readings.consumption_costs[0].electricity.total_delivery_consumption == 0.5
+
+
+def test_replay_waits_for_recorded_time():
+    session = ReplaySession(exchanges(), speed=1.0)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await session.get(f"{SSO_URL}/api/antiforgery")
+        return loop.time() - started
+
+    assert asyncio.run(run()) >= 0.01
+
+
+def test_replay_fails_for_unrecorded_requests():
+    session = ReplaySession(exchanges(), speed=0)
+
+    async def run():
+        await session.get(f"{BASE_URL}/api/v2/unknown")
+
+    with pytest.raises(aiohttp.ClientConnectionError, match="No recorded exchange"):
+        asyncio.run(run())